@@ -64,10 +64,12 @@ async function checkSpecificCPT() {
   try {
     const cptCodes = ['99385', '71045', '92502', '80053']; // Common CPT codes
     
-    for (const code of cptCodes) {
+    // Fetch all codes in a single round-trip
+    const docs = await db.getAll(...cptCodes.map(code => db.collection('cptCodeMappings').doc(code)));
+    
+    for (const [index, code] of cptCodes.entries()) {
       console.log(`Checking CPT code: ${code}`);
-      const docRef = db.collection('cptCodeMappings').doc(code);
-      const doc = await docRef.get();
+      const doc = docs[index];
       
       if (doc.exists) {
         const data = doc.data();
@@ -525,21 +525,28 @@ export default function BillAnalysis() {
           console.error('Error getting user token:', tokenError);
         }
         
-        // Fetch user profile
+        // Fetch user profile and bill data concurrently; neither depends on the other
         try {
-          console.log('Fetching user profile for:', user.uid);
-          const profileDoc = await getDoc(doc(db, 'userProfiles', user.uid));
-          if (profileDoc.exists()) {
-            console.log('User profile found');
-            setUserProfile(profileDoc.data());
-          } else {
-            console.log('No user profile found');
-          }
-          if (billId) {
-            console.log('Fetching bill data for:', billId);
-            await fetchBillData(billId, user);
-            await fetchAnalysisVersions(billId);
-          }
+          const loadProfile = async () => {
+            console.log('Fetching user profile for:', user.uid);
+            const profileDoc = await getDoc(doc(db, 'userProfiles', user.uid));
+            if (profileDoc.exists()) {
+              console.log('User profile found');
+              setUserProfile(profileDoc.data());
+            } else {
+              console.log('No user profile found');
+            }
+          };
+          
+          const loadBill = async () => {
+            if (billId) {
+              console.log('Fetching bill data for:', billId);
+              await fetchBillData(billId, user);
+              await fetchAnalysisVersions(billId);
+            }
+          };
+          
+          await Promise.all([loadProfile(), loadBill()]);
         } catch (error) {
           console.error('Error in auth state change:', error);
           setError(error.message);
@@ -635,12 +642,6 @@ export default function BillAnalysis() {
       const data = { id: billDoc.id, ...billDoc.data() };
       console.log('Bill data retrieved successfully:', data);
       
-      // Test API endpoint
-      console.log('Testing API endpoint...');
-      const testResponse = await fetch('/api/test');
-      const testData = await testResponse.json();
-      console.log('Test API response:', testData);
-      
       // Set the data
       setBillData(data);
       
@@ -972,28 +973,29 @@ export default function BillAnalysis() {
               // Continue without summary
             }
             
-            // Set a timer to check the status periodically
-            const checkStatusInterval = setInterval(async () => {
-              try {
-                console.log('Checking bill status...');
-                const billDoc = await getDoc(billRef);
+            // Listen for the status change instead of polling the bill every 10 seconds;
+            // Firestore pushes the update as soon as the background analysis writes it
+            const unsubscribeStatus = onSnapshot(
+              billRef,
+              (billDoc) => {
                 if (billDoc.exists() && billDoc.data().status === 'analyzed') {
                   console.log('Bill analysis complete, reloading page');
-                  clearInterval(checkStatusInterval);
+                  unsubscribeStatus();
                   
                   // Reload the page to get the latest data
                   window.location.reload();
-      } else {
+                } else {
                   console.log('Bill still processing, current status:', billDoc.data()?.status || 'unknown');
                 }
-              } catch (error) {
+              },
+              (error) => {
                 console.error('Error checking bill status:', error);
               }
-            }, 10000); // Check every 10 seconds
+            );
             
-            // Clear the interval after 5 minutes (30 checks)
+            // Stop listening after 5 minutes
             setTimeout(() => {
-              clearInterval(checkStatusInterval);
+              unsubscribeStatus();
               console.log('Processing timeout reached');
               setAnalysisStatus('error');
               setAnalysisError({
@@ -1267,17 +1269,9 @@ export default function BillAnalysis() {
       };
       
       console.log(`Updating bill ${billId} with:`, updateData);
+      // updateDoc only resolves once the write is committed, so no re-read is needed
       await updateDoc(billRef, updateData);
       
-      // Double-check that the update was successful
-      const updatedBillDoc = await getDoc(billRef);
-      const updatedData = updatedBillDoc.data();
-      console.log(`Updated bill data for ${billId}:`, {
-        hasAnalyzedAt: !!updatedData.analyzedAt,
-        hasAnalyzedAtString: !!updatedData.analyzedAtString,
-        status: updatedData.status
-      });
-      
       console.log(`Successfully updated bill ${billId}. Navigating to dashboard...`);
       
       // Add a longer delay to ensure Firestore has time to update
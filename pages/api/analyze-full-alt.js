@@ -62,14 +62,15 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
   console.log(`Starting document analysis for bill ${billId}`);
   
   try {
-    // Fetch the file buffer
-    const fileBuffer = await fetchFileBuffer(fileUrl);
+    // Fetch the file buffer and detect the file type concurrently; they're independent requests
+    const [fileBuffer, fileType] = await Promise.all([
+      fetchFileBuffer(fileUrl),
+      detectFileType(fileUrl)
+    ]);
     if (!fileBuffer) {
       throw new Error('Failed to fetch file');
     }
     
-    // Detect file type
-    const fileType = await detectFileType(fileUrl);
     if (!fileType) {
       throw new Error('Could not detect file type');
     }
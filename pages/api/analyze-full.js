@@ -106,10 +106,11 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
       
       extractedText = await extractTextFromPDF(fileBuffer);
     } else if (fileType === 'image') {
+      let fileBuffer = null;
       try {
         // For images, use the standard approach first
         console.log('Fetching image file buffer...');
-        const fileBuffer = await fetchFileBuffer(fileUrl);
+        fileBuffer = await fetchFileBuffer(fileUrl);
         console.log(`Image file buffer fetched, size: ${fileBuffer.length} bytes`);
         
         extractedText = await extractTextFromImage(fileBuffer);
@@ -119,15 +120,18 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
         // If standard approach fails, try a different method
         // This is a workaround for the "DECODER routines::unsupported" error
         
-        // Create a base64 image directly from the URL
-        const response = await fetch(fileUrl);
-        if (!response.ok) {
-          throw new Error(`Failed to fetch image: ${response.status} ${response.statusText}`);
+        // Reuse the buffer we already downloaded; only go back to the URL if the fetch itself failed
+        let buffer = fileBuffer;
+        if (!buffer) {
+          const response = await fetch(fileUrl);
+          if (!response.ok) {
+            throw new Error(`Failed to fetch image: ${response.status} ${response.statusText}`);
+          }
+          
+          const arrayBuffer = await response.arrayBuffer();
+          buffer = Buffer.from(arrayBuffer);
         }
         
-        const arrayBuffer = await response.arrayBuffer();
-        const buffer = Buffer.from(arrayBuffer);
-        
         // Use a simpler request format for Google Vision API
         const request = {
           image: {
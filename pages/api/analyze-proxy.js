@@ -12,12 +12,12 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
   console.log('Starting document analysis...', { fileUrl, billId });
   
   try {
-    // Detect file type first
-    const fileType = await detectFileType(fileUrl);
+    // Detect file type and fetch the file buffer concurrently; they're independent requests
+    const [fileType, fileBuffer] = await Promise.all([
+      detectFileType(fileUrl),
+      fetchFileBuffer(fileUrl)
+    ]);
     console.log('File type detected:', fileType);
-
-    // Fetch file buffer
-    const fileBuffer = await fetchFileBuffer(fileUrl);
     console.log('File fetched, size:', fileBuffer.length);
 
     // Extract text based on file type
@@ -84,20 +84,37 @@ function sanitizeForFirestore(obj) {
   return sanitized;
 }
 
-// Add function to handle progress updates
-async function trackProgress(billId, stage, progressPercent, message = '') {
-  if (billId === 'client-request') return; // Skip tracking for client-side requests
+// Pending progress writes per bill, so updates land in order without the
+// analysis having to wait on each Firestore round-trip
+const progressQueues = new Map();
+
+// Add function to handle progress updates. The returned promise resolves once this
+// update (and every earlier one for the bill) has been written
+function trackProgress(billId, stage, progressPercent, message = '') {
+  if (billId === 'client-request') return Promise.resolve(); // Skip tracking for client-side requests
   
   console.log(`PROGRESS UPDATE: ${billId} - Stage: ${stage} - Progress: ${progressPercent}%`);
   
-  try {
-    await updateAnalysisProgress(billId, stage, progressPercent, message);
-    console.log(`PROGRESS UPDATE SUCCESSFUL: ${stage} at ${progressPercent}%`);
-  } catch (error) {
-    console.error('Error updating progress:', error);
-    console.error('Error details:', JSON.stringify(error));
-    // Continue processing even if progress tracking fails
-  }
+  const previous = progressQueues.get(billId) || Promise.resolve();
+  const next = previous.then(async () => {
+    try {
+      await updateAnalysisProgress(billId, stage, progressPercent, message);
+      console.log(`PROGRESS UPDATE SUCCESSFUL: ${stage} at ${progressPercent}%`);
+    } catch (error) {
+      console.error('Error updating progress:', error);
+      console.error('Error details:', JSON.stringify(error));
+      // Continue processing even if progress tracking fails
+    }
+  });
+  
+  progressQueues.set(billId, next);
+  next.then(() => {
+    if (progressQueues.get(billId) === next) {
+      progressQueues.delete(billId);
+    }
+  });
+  
+  return next;
 }
 
 // Function to analyze a document
@@ -107,16 +124,16 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
   
   try {
     // Verify parameters
-    await trackProgress(billId, 'Starting Analysis', 10, 'Preparing to process document');
+    trackProgress(billId, 'Starting Analysis', 10, 'Preparing to process document');
     
     // Detect file type
-    await trackProgress(billId, 'Document Loaded', 15, 'Document loaded for processing');
+    trackProgress(billId, 'Document Loaded', 15, 'Document loaded for processing');
     console.log('Detecting file type...');
     const fileType = await detectFileType(fileUrl);
     console.log(`File type detected: ${fileType}`);
     
     // Extract text based on file type
-    await trackProgress(billId, 'OCR Starting', 20, 'Beginning text extraction');
+    trackProgress(billId, 'OCR Starting', 20, 'Beginning text extraction');
     console.log('Extracting text...');
     let extractedText = '';
     
@@ -128,10 +145,11 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
       
       extractedText = await extractTextFromPDF(fileBuffer);
     } else if (fileType === 'image') {
+      let fileBuffer = null;
       try {
         // For images, use the standard approach first
         console.log('Fetching image file buffer...');
-        const fileBuffer = await fetchFileBuffer(fileUrl);
+        fileBuffer = await fetchFileBuffer(fileUrl);
         console.log(`Image file buffer fetched, size: ${fileBuffer.length} bytes`);
         
         extractedText = await extractTextFromImage(fileBuffer);
@@ -141,15 +159,18 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
         // If standard approach fails, try a different method
         // This is a workaround for the "DECODER routines::unsupported" error
         
-        // Create a base64 image directly from the URL
-        const response = await fetch(fileUrl);
-        if (!response.ok) {
-          throw new Error(`Failed to fetch image: ${response.status} ${response.statusText}`);
+        // Reuse the buffer we already downloaded; only go back to the URL if the fetch itself failed
+        let buffer = fileBuffer;
+        if (!buffer) {
+          const response = await fetch(fileUrl);
+          if (!response.ok) {
+            throw new Error(`Failed to fetch image: ${response.status} ${response.statusText}`);
+          }
+          
+          const arrayBuffer = await response.arrayBuffer();
+          buffer = Buffer.from(arrayBuffer);
         }
         
-        const arrayBuffer = await response.arrayBuffer();
-        const buffer = Buffer.from(arrayBuffer);
-        
         // Use a simpler request format for Google Vision API
         const request = {
           image: {
@@ -170,7 +191,7 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
       throw new Error(`Unsupported file type: ${fileType}`);
     }
     
-    await trackProgress(billId, 'OCR Complete', 30, `Extracted ${extractedText.length} characters of text`);
+    trackProgress(billId, 'OCR Complete', 30, `Extracted ${extractedText.length} characters of text`);
     console.log(`Text extracted, length: ${extractedText.length} characters`);
     console.log(`First 100 chars: ${extractedText.substring(0, 100)}`);
     
@@ -180,7 +201,7 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
     console.log('Billing codes extracted:', JSON.stringify(extractedCodes, null, 2));
     
     // Use our enhanced AI analysis
-    await trackProgress(billId, 'AI Analysis', 40, 'Beginning AI document analysis');
+    trackProgress(billId, 'AI Analysis', 40, 'Beginning AI document analysis');
     console.log('Starting enhanced AI analysis...');
     const enhancedAnalysisResult = await enhancedAnalyzeWithAI(extractedText);
     console.log('Enhanced analysis complete:', enhancedAnalysisResult.isMedicalBill ? 'Medical bill detected' : 'Not a medical bill');
@@ -206,7 +227,7 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
       }
     }
     
-    await trackProgress(billId, 'Verification Complete', 50, 'Document verified as medical bill');
+    trackProgress(billId, 'Verification Complete', 50, 'Document verified as medical bill');
     
     // Update the bill document in Firestore
     if (billId !== 'client-request' && userId !== 'client-request') {
@@ -246,18 +267,18 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
       }
     }
     
-    await trackProgress(billId, 'Data Extraction', 60, 'Extracting bill data');
+    trackProgress(billId, 'Data Extraction', 60, 'Extracting bill data');
     
     // After data extraction, before service enhancement
-    await trackProgress(billId, 'Processing Services', 70, `Processing ${extractedData.services.length} medical services`);
+    trackProgress(billId, 'Processing Services', 70, `Processing ${extractedData.services.length} medical services`);
     
     // After service enhancement
-    await trackProgress(billId, 'Calculating Rates', 85, 'Calculating Medicare rates and savings');
+    trackProgress(billId, 'Calculating Rates', 85, 'Calculating Medicare rates and savings');
     
     // Before final response
-    await trackProgress(billId, 'Analysis Complete', 95, 'Finalizing analysis results');
+    trackProgress(billId, 'Analysis Complete', 95, 'Finalizing analysis results');
     
-    // Just before returning the final response
+    // Just before returning the final response; waits for all queued progress writes
     await trackProgress(billId, 'Complete', 100, 'Analysis complete');
     
     // Return the results
@@ -275,6 +296,8 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
     };
   } catch (error) {
     console.error('Error analyzing document:', error);
+    // Let queued progress writes finish before the response ends the invocation
+    await progressQueues.get(billId);
     throw error;
   }
 };
@@ -16,14 +16,13 @@ const analyzeDocument = async (fileUrl, userId, billId) => {
   let fileType, fileBuffer, extractedText;
   
   try {
-    // Detect file type first
-    console.log('Detecting file type...');
-    fileType = await detectFileType(fileUrl);
+    // Detect file type and fetch the file buffer concurrently; they're independent requests
+    console.log('Detecting file type and fetching file buffer...');
+    [fileType, fileBuffer] = await Promise.all([
+      detectFileType(fileUrl),
+      fetchFileBuffer(fileUrl)
+    ]);
     console.log('File type detected:', fileType);
-
-    // Fetch file buffer
-    console.log('Fetching file buffer...');
-    fileBuffer = await fetchFileBuffer(fileUrl);
     console.log('File fetched, size:', fileBuffer.length, 'bytes');
 
     // Extract text based on file type
@@ -19,21 +19,46 @@ export default async function handler(req, res) {
       const bucket = adminStorage.bucket();
       const file = bucket.file(decodeURIComponent(path));
       
-      // Check if file exists
-      const [exists] = await file.exists();
-      if (!exists) {
-        console.error(`File does not exist: ${path}`);
-        return res.status(404).json({ error: 'File not found' });
+      // Get file metadata for content type; a missing file fails here with a 404,
+      // so there's no need for a separate exists() round-trip
+      let metadata;
+      try {
+        [metadata] = await file.getMetadata();
+      } catch (metadataError) {
+        if (metadataError.code === 404) {
+          console.error(`File does not exist: ${path}`);
+          return res.status(404).json({ error: 'File not found' });
+        }
+        throw metadataError;
       }
-      
-      // Get file metadata for content type
-      const [metadata] = await file.getMetadata();
       const contentType = metadata.contentType || 'application/octet-stream';
-      
+      const etag = `"${metadata.etag}"`;
+      const lastModified = metadata.updated ? new Date(metadata.updated) : null;
+
       // Set appropriate headers
       res.setHeader('Content-Type', contentType);
       res.setHeader('Cache-Control', 'public, max-age=3600');
-      
+      res.setHeader('ETag', etag);
+      if (lastModified) {
+        res.setHeader('Last-Modified', lastModified.toUTCString());
+      }
+
+      // Skip the download entirely if the client already has this version.
+      // If-None-Match takes precedence; If-Modified-Since is only checked without it
+      const ifNoneMatch = req.headers['if-none-match'];
+      const ifModifiedSince = req.headers['if-modified-since'];
+      if (ifNoneMatch) {
+        if (ifNoneMatch.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag)) {
+          return res.status(304).end();
+        }
+      } else if (ifModifiedSince && lastModified) {
+        // HTTP dates only have second precision
+        const since = Date.parse(ifModifiedSince);
+        if (!Number.isNaN(since) && Math.floor(lastModified.getTime() / 1000) * 1000 <= since) {
+          return res.status(304).end();
+        }
+      }
+
       // Stream the file directly to the response
       const readStream = file.createReadStream();
       readStream.pipe(res);
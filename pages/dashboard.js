@@ -6,7 +6,7 @@ import Link from 'next/link';
 import { doc, getDoc, updateDoc, arrayUnion, setDoc, deleteDoc } from 'firebase/firestore';
 import { db, storage } from '../firebase';
 import { ref, uploadBytes, getDownloadURL, deleteObject } from 'firebase/storage';
-import { collection, addDoc, serverTimestamp, query, where, orderBy, limit, getDocs } from 'firebase/firestore';
+import { collection, serverTimestamp, query, where, limit, getDocs, writeBatch } from 'firebase/firestore';
 
 export default function Dashboard() {
   const router = useRouter();
@@ -32,18 +32,11 @@ export default function Dashboard() {
   const [isDragging, setIsDragging] = useState(false);
   const [dragCounter, setDragCounter] = useState(0);
 
-  const fetchUploads = useCallback(async () => {
-    if (!user) return;
-
+  const buildUploads = useCallback((billDocs) => {
     try {
-      const q = query(
-        collection(db, 'bills'),
-        where('userId', '==', user.uid),
-        orderBy('timestamp', 'desc')
-      );
-
-      const querySnapshot = await getDocs(q);
-      const uploads = querySnapshot.docs.map(doc => {
+      // Newest uploads first
+      const sortedDocs = [...billDocs].sort((a, b) => (b.data().timestamp || 0) - (a.data().timestamp || 0));
+      const uploads = sortedDocs.map(doc => {
         const data = doc.data();
         console.log('Raw bill data:', data); // Log raw data
         return {
@@ -62,21 +55,9 @@ export default function Dashboard() {
     }
   }, [user]);
 
-  const fetchAnalyzedBills = useCallback(async () => {
-    if (!user) return;
-
-    console.log('Fetching analyzed bills for user:', user.uid);
+  const buildAnalyzedBills = useCallback((billDocs) => {
     try {
-      // Query for all bills belonging to the user
-      const q = query(
-        collection(db, 'bills'),
-        where('userId', '==', user.uid)
-      );
-
-      const querySnapshot = await getDocs(q);
-      console.log('Found bills:', querySnapshot.size);
-      
-      const bills = querySnapshot.docs
+      const bills = billDocs
         .map(doc => {
           const data = doc.data();
           console.log('Processing bill:', doc.id, data);
@@ -175,7 +156,29 @@ export default function Dashboard() {
     } catch (error) {
       console.error('Error fetching analyzed bills:', error);
     }
-  }, [user]);
+  }, []);
+
+  // Recent uploads and analyzed bills both come from the user's bills, so query them
+  // once and build both lists from the same snapshot
+  const fetchBills = useCallback(async () => {
+    if (!user) return;
+
+    console.log('Fetching bills for user:', user.uid);
+    try {
+      const q = query(
+        collection(db, 'bills'),
+        where('userId', '==', user.uid)
+      );
+
+      const querySnapshot = await getDocs(q);
+      console.log('Found bills:', querySnapshot.size);
+
+      buildUploads(querySnapshot.docs);
+      buildAnalyzedBills(querySnapshot.docs);
+    } catch (error) {
+      console.error('Error fetching bills:', error);
+    }
+  }, [user, buildUploads, buildAnalyzedBills]);
 
   useEffect(() => {
     const unsubscribe = auth.onAuthStateChanged(async (user) => {
@@ -190,10 +193,7 @@ export default function Dashboard() {
             setUserProfile(profileDoc.data());
             // Fetch bills after profile is loaded
             console.log('Profile loaded, fetching bills...');
-            await Promise.all([
-              fetchUploads(),
-              fetchAnalyzedBills()
-            ]);
+            await fetchBills();
             console.log('Successfully loaded all dashboard data');
           } else {
             // Redirect to profile setup if no profile exists
@@ -220,7 +220,7 @@ export default function Dashboard() {
       unsubscribe();
       window.removeEventListener('resize', handleResize);
     };
-  }, [router, fetchUploads, fetchAnalyzedBills, lastRefreshTime]);
+  }, [router, fetchBills, lastRefreshTime]);
 
   // Add this useEffect to listen for router events
   useEffect(() => {
@@ -252,10 +252,7 @@ export default function Dashboard() {
       if (user) {
         console.log('Dashboard mounted or focused, refreshing data...');
         try {
-          await Promise.all([
-            fetchUploads(),
-            fetchAnalyzedBills()
-          ]);
+          await fetchBills();
           console.log('Dashboard data refreshed successfully');
         } catch (error) {
           console.error('Error refreshing dashboard data:', error);
@@ -278,7 +275,7 @@ export default function Dashboard() {
     return () => {
       document.removeEventListener('visibilitychange', handleVisibilityChange);
     };
-  }, [user, fetchUploads, fetchAnalyzedBills]);
+  }, [user, fetchBills]);
 
   const UserAvatar = ({ email }) => (
     <div style={{
@@ -444,8 +441,13 @@ export default function Dashboard() {
       const downloadURL = await getDownloadURL(snapshot.ref);
       console.log('Got download URL:', downloadURL);
       
-      console.log('Saving metadata to Firestore...');
-      const billDocRef = await addDoc(collection(db, 'bills'), {
+      // Save the bill and add it to the user profile in one batched commit
+      // (the bill ID is generated client-side, so both writes can go together)
+      console.log('Saving metadata to Firestore and updating user profile...');
+      const billDocRef = doc(collection(db, 'bills'));
+      const userProfileRef = doc(db, 'userProfiles', user.uid);
+      const batch = writeBatch(db);
+      batch.set(billDocRef, {
         userId: user.uid,
         fileName: fileName,
         originalName: selectedFile.name,
@@ -456,19 +458,15 @@ export default function Dashboard() {
         fileSize: selectedFile.size,
         storagePath: storageRef.fullPath
       });
-      console.log('Saved to Firestore with ID:', billDocRef.id);
-
-      // Update user profile
-      console.log('Updating user profile...');
-      const userProfileRef = doc(db, 'userProfiles', user.uid);
-      await updateDoc(userProfileRef, {
+      batch.update(userProfileRef, {
         bills: arrayUnion({
           billId: billDocRef.id,
           fileName: fileName,
           uploadedAt: timestamp
         })
       });
-      console.log('Updated user profile');
+      await batch.commit();
+      console.log('Saved to Firestore with ID:', billDocRef.id);
 
       // Reset states
       setSelectedFile(null);
@@ -517,10 +515,12 @@ export default function Dashboard() {
       // Delete all analyses for this bill
       const analysesRef = collection(db, 'bills', billId, 'analyses');
       const analysesSnapshot = await getDocs(analysesRef);
-      const deleteAnalysesPromises = analysesSnapshot.docs.map(doc => 
-        deleteDoc(doc.ref)
-      );
-      await Promise.all(deleteAnalysesPromises);
+      // Delete in batched writes instead of one request per analysis (Firestore caps a batch at 500)
+      for (let i = 0; i < analysesSnapshot.docs.length; i += 500) {
+        const batch = writeBatch(db);
+        analysesSnapshot.docs.slice(i, i + 500).forEach(doc => batch.delete(doc.ref));
+        await batch.commit();
+      }
       console.log('Successfully deleted all analyses');
       
       // Delete from Storage
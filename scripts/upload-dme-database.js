@@ -98,7 +98,8 @@ function determineDMECategory(code, description) {
 async function uploadDMEDatabase() {
   try {
     console.log('Reading DME Excel file...');
-    const workbook = xlsx.readFile(dmeFilePath);
+    // Only the first sheet is used, so don't parse the rest of the workbook
+    const workbook = xlsx.readFile(dmeFilePath, { sheets: 0 });
     const worksheet = workbook.Sheets[workbook.SheetNames[0]];
     const data = xlsx.utils.sheet_to_json(worksheet);
     
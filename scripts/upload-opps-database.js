@@ -55,7 +55,8 @@ async function uploadOPPSDatabase() {
   try {
     // Read the Excel file
     console.log(`Reading Excel file from: ${oppsFilePath}`);
-    const workbook = xlsx.readFile(oppsFilePath);
+    // Only the first sheet is used, so don't parse the rest of the workbook
+    const workbook = xlsx.readFile(oppsFilePath, { sheets: 0 });
     const sheetName = workbook.SheetNames[0];
     const worksheet = workbook.Sheets[sheetName];
     
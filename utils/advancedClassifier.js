@@ -32,6 +32,12 @@ const PRICING_MODELS = {
   [ENHANCED_CATEGORIES.HOSPITAL_STAYS]: 'DRG'
 };
 
+/**
+ * Valid enhanced category names, built once for validating OpenAI responses
+ */
+const VALID_ENHANCED_CATEGORIES = Object.values(ENHANCED_CATEGORIES);
+const VALID_ENHANCED_CATEGORY_SET = new Set(VALID_ENHANCED_CATEGORIES);
+
 /**
  * Map from old 6-category system to new 7-category system
  * @param {string} oldCategory - The old category
@@ -670,12 +676,10 @@ Please categorize this service into one of these seven categories. Respond in JS
       console.log('[ADVANCED_CLASSIFIER] OpenAI response:', JSON.stringify(result, null, 2));
       
       // Validate the category
-      const validCategories = Object.values(ENHANCED_CATEGORIES);
-      
-      if (!validCategories.includes(result.category)) {
+      if (!VALID_ENHANCED_CATEGORY_SET.has(result.category)) {
         console.warn('[ADVANCED_CLASSIFIER] OpenAI returned invalid category:', result.category);
         // Try to map to the closest category
-        for (const validCategory of validCategories) {
+        for (const validCategory of VALID_ENHANCED_CATEGORIES) {
           if (result.category.toLowerCase().includes(validCategory.toLowerCase())) {
             console.log(`[ADVANCED_CLASSIFIER] Mapped invalid category "${result.category}" to "${validCategory}"`);
             return { 
@@ -711,8 +715,9 @@ Please categorize this service into one of these seven categories. Respond in JS
       lastError = error;
       console.error(`[ADVANCED_CLASSIFIER] Error categorizing service with OpenAI (Attempt ${retryCount + 1}/${MAX_RETRIES}):`, error);
       
-      // Implement exponential backoff
-      const backoffTime = Math.min(1000 * Math.pow(2, retryCount), 8000); // Max 8 second backoff
+      // Implement exponential backoff with jitter so concurrent failures don't retry in lockstep
+      const backoffTime = Math.min(1000 * Math.pow(2, retryCount), 8000) // Max 8 second backoff
+        + Math.floor(Math.random() * 500);
       console.log(`[ADVANCED_CLASSIFIER] Retrying in ${backoffTime}ms...`);
       await new Promise(resolve => setTimeout(resolve, backoffTime));
       
@@ -725,6 +730,17 @@ Please categorize this service into one of these seven categories. Respond in JS
   throw new Error(`Failed to categorize with OpenAI after ${MAX_RETRIES} attempts: ${lastError.message}`);
 }
 
+// Define category keywords for the advanced system's fallback categorization
+const FALLBACK_CATEGORY_KEYWORDS = Object.entries({
+  [ENHANCED_CATEGORIES.OFFICE_VISITS]: ['office visit', 'consult', 'evaluation', 'exam', 'check-up', 'checkup'],
+  [ENHANCED_CATEGORIES.OUTPATIENT_PROCEDURES]: ['outpatient', 'procedure', 'surgery', 'biopsy', 'repair', 'implant', 'removal'],
+  [ENHANCED_CATEGORIES.INPATIENT_PROCEDURES]: ['inpatient procedure', 'inpatient surgery'],
+  [ENHANCED_CATEGORIES.LAB_DIAGNOSTIC]: ['lab', 'test', 'blood', 'urine', 'specimen', 'diagnostic', 'x-ray', 'scan', 'mri', 'ct'],
+  [ENHANCED_CATEGORIES.DRUGS_INFUSIONS]: ['drug', 'medication', 'injection', 'infusion', 'iv', 'vaccine', 'ondansetron', 'promethazine', 'famotidine'],
+  [ENHANCED_CATEGORIES.MEDICAL_EQUIPMENT]: ['equipment', 'supply', 'device', 'prosthetic', 'orthotic', 'brace'],
+  [ENHANCED_CATEGORIES.HOSPITAL_STAYS]: ['emergency', 'er', 'hospital', 'inpatient', 'room', 'admission']
+});
+
 /**
  * Fallback categorization using keyword matching when OpenAI fails
  * @param {Object} service - The service to categorize
@@ -737,19 +753,8 @@ function fallbackAdvancedCategorization(service, extractedCodes, setting) {
   
   const description = (service.description || '').toLowerCase();
   
-  // Define category keywords for the advanced system
-  const categoryKeywords = {
-    [ENHANCED_CATEGORIES.OFFICE_VISITS]: ['office visit', 'consult', 'evaluation', 'exam', 'check-up', 'checkup'],
-    [ENHANCED_CATEGORIES.OUTPATIENT_PROCEDURES]: ['outpatient', 'procedure', 'surgery', 'biopsy', 'repair', 'implant', 'removal'],
-    [ENHANCED_CATEGORIES.INPATIENT_PROCEDURES]: ['inpatient procedure', 'inpatient surgery'],
-    [ENHANCED_CATEGORIES.LAB_DIAGNOSTIC]: ['lab', 'test', 'blood', 'urine', 'specimen', 'diagnostic', 'x-ray', 'scan', 'mri', 'ct'],
-    [ENHANCED_CATEGORIES.DRUGS_INFUSIONS]: ['drug', 'medication', 'injection', 'infusion', 'iv', 'vaccine', 'ondansetron', 'promethazine', 'famotidine'],
-    [ENHANCED_CATEGORIES.MEDICAL_EQUIPMENT]: ['equipment', 'supply', 'device', 'prosthetic', 'orthotic', 'brace'],
-    [ENHANCED_CATEGORIES.HOSPITAL_STAYS]: ['emergency', 'er', 'hospital', 'inpatient', 'room', 'admission']
-  };
-  
   // Check each category for matching keywords
-  for (const [category, keywords] of Object.entries(categoryKeywords)) {
+  for (const [category, keywords] of FALLBACK_CATEGORY_KEYWORDS) {
     for (const keyword of keywords) {
       if (description.includes(keyword)) {
         console.log(`[ADVANCED_CLASSIFIER] Matched service to "${category}" based on keyword "${keyword}"`);
@@ -892,6 +897,31 @@ function fallbackAdvancedCategorization(service, extractedCodes, setting) {
   };
 }
 
+// Fallback rates for common DRG codes missing from the database
+const COMMON_DRG_CODES = {
+  '470': {
+    code: '470',
+    description: 'Major Joint Replacement or Reattachment of Lower Extremity w/o MCC',
+    rate: 12000,
+    averageLength: 2.4,
+    relativeWeight: 2.0235
+  },
+  '291': {
+    code: '291',
+    description: 'Heart Failure and Shock with MCC',
+    rate: 9500,
+    averageLength: 4.8,
+    relativeWeight: 1.7522
+  },
+  '392': {
+    code: '392',
+    description: 'Esophagitis, Gastroenteritis and Misc Digestive Disorders w/o MCC',
+    rate: 5800,
+    averageLength: 2.7,
+    relativeWeight: 0.7798
+  }
+};
+
 /**
  * Look up a DRG code
  * @param {string} drgCode - The DRG code to look up
@@ -918,33 +948,9 @@ async function lookupDRGCode(drgCode) {
     }
     
     // If not in database, use some common DRG codes
-    const commonDRGCodes = {
-      '470': {
-        code: '470',
-        description: 'Major Joint Replacement or Reattachment of Lower Extremity w/o MCC',
-        rate: 12000,
-        averageLength: 2.4,
-        relativeWeight: 2.0235
-      },
-      '291': {
-        code: '291',
-        description: 'Heart Failure and Shock with MCC',
-        rate: 9500,
-        averageLength: 4.8,
-        relativeWeight: 1.7522
-      },
-      '392': {
-        code: '392',
-        description: 'Esophagitis, Gastroenteritis and Misc Digestive Disorders w/o MCC',
-        rate: 5800,
-        averageLength: 2.7,
-        relativeWeight: 0.7798
-      }
-    };
-    
-    if (commonDRGCodes[drgCode]) {
-      console.log('[ADVANCED_CLASSIFIER] Found DRG code in common codes:', commonDRGCodes[drgCode]);
-      return commonDRGCodes[drgCode];
+    if (COMMON_DRG_CODES[drgCode]) {
+      console.log('[ADVANCED_CLASSIFIER] Found DRG code in common codes:', COMMON_DRG_CODES[drgCode]);
+      return { ...COMMON_DRG_CODES[drgCode] };
     }
     
     console.log(`[ADVANCED_CLASSIFIER] DRG code ${drgCode} not found`);
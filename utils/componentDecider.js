@@ -222,10 +222,10 @@ Service Description: "${service.description}"`;
     
     // Add other services from the bill for context
     if (billContext.otherServices && billContext.otherServices.length > 0) {
-      prompt += `\n\nOther Services on the Bill:`;
-      billContext.otherServices.slice(0, 5).forEach(otherService => {
-        prompt += `\n- ${otherService.description}`;
-      });
+      const otherServiceLines = billContext.otherServices
+        .slice(0, 5)
+        .map(otherService => `\n- ${otherService.description}`);
+      prompt += `\n\nOther Services on the Bill:${otherServiceLines.join('')}`;
     }
     
     prompt += `\n\nPlease determine whether this service should be billed using:
@@ -1,5 +1,6 @@
 import { adminDb } from '../firebase/admin.js';
 import { OpenAI } from 'openai';
+import { createHash } from 'crypto';
 
 // Initialize OpenAI client
 const openai = new OpenAI({
@@ -9,6 +10,20 @@ const openai = new OpenAI({
 // Use the existing Firebase Admin instance
 const db = adminDb;
 
+// Fields read from cptCodeMappings when scoring candidates; queries project to these
+// instead of pulling whole documents (keyword arrays etc.)
+const CPT_MATCH_FIELDS = ['code', 'description', 'nonFacilityRate', 'facilityRate'];
+
+// Cache OpenAI matches per warm instance, keyed by a hash of the prompt, so
+// repeated line items (same description and context) don't pay for another call
+const OPENAI_MATCH_CACHE_SIZE = 500;
+const openAIMatchCache = new Map();
+
+// Cache direct code lookups (including misses) per warm instance; cptCodeMappings is
+// reference data, so the same codes don't need to be re-read for every bill
+const CPT_LOOKUP_CACHE_SIZE = 2000;
+const cptLookupCache = new Map();
+
 /**
  * Match a service description to a CPT code
  * @param {string} serviceDescription - The service description from the bill
@@ -136,27 +151,42 @@ async function lookupCPTCode(cptCode) {
   try {
     console.log(`[CPT_MATCHER_LOOKUP] Looking up CPT code: ${cptCode}`);
     
+    if (cptLookupCache.has(cptCode)) {
+      const cached = cptLookupCache.get(cptCode);
+      console.log(`[CPT_MATCHER_LOOKUP] Using cached lookup for CPT code ${cptCode}`);
+      return cached ? { ...cached } : null;
+    }
+    
     // Query the database for the CPT code
     const querySnapshot = await db.collection('cptCodeMappings')
       .where('code', '==', cptCode)
       .limit(1)
       .get();
     
+    let codeInfo = null;
+    
     if (querySnapshot.empty) {
       console.log(`[CPT_MATCHER_LOOKUP] CPT code ${cptCode} not found in database`);
-      return null;
+    } else {
+      const data = querySnapshot.docs[0].data();
+      console.log(`[CPT_MATCHER_LOOKUP] Found CPT code in database: ${data.code} - "${data.description}"`);
+      
+      codeInfo = {
+        cptCode: data.code,
+        description: data.description,
+        confidence: 1.0, // High confidence since it's a direct code lookup
+        nonFacilityRate: data.nonFacilityRate || null,
+        facilityRate: data.facilityRate || null
+      };
     }
     
-    const data = querySnapshot.docs[0].data();
-    console.log(`[CPT_MATCHER_LOOKUP] Found CPT code in database: ${data.code} - "${data.description}"`);
+    // Evict the oldest entry once the cache is full (Map keeps insertion order)
+    if (cptLookupCache.size >= CPT_LOOKUP_CACHE_SIZE) {
+      cptLookupCache.delete(cptLookupCache.keys().next().value);
+    }
+    cptLookupCache.set(cptCode, codeInfo);
     
-    return {
-      cptCode: data.code,
-      description: data.description,
-      confidence: 1.0, // High confidence since it's a direct code lookup
-      nonFacilityRate: data.nonFacilityRate || null,
-      facilityRate: data.facilityRate || null
-    };
+    return codeInfo ? { ...codeInfo } : null;
   } catch (error) {
     console.error('[CPT_MATCHER_LOOKUP] Error looking up CPT code:', error);
     return null;
@@ -188,6 +218,7 @@ async function findExactMatch(serviceDescription, serviceCategory) {
     if (querySnapshot.empty) {
       // Try with a more flexible approach - check if the service description is contained in any CPT description
       const allCodesSnapshot = await db.collection('cptCodeMappings')
+        .select(...CPT_MATCH_FIELDS)
         .limit(1000) // Limit to prevent excessive processing
         .get();
       
@@ -375,6 +406,7 @@ async function findMatchInDatabase(serviceDescription, serviceCategory) {
           .where('keywords', 'array-contains-any', keywords)
           .where('code', '>=', codePattern.start)
           .where('code', '<=', codePattern.end)
+          .select(...CPT_MATCH_FIELDS)
           .limit(20)
           .get();
           
@@ -385,6 +417,7 @@ async function findMatchInDatabase(serviceDescription, serviceCategory) {
           console.log('[CPT_MATCHER_DB] No matches found with category filter, falling back to keyword-only query');
           querySnapshot = await db.collection('cptCodeMappings')
             .where('keywords', 'array-contains-any', keywords)
+            .select(...CPT_MATCH_FIELDS)
             .limit(20)
             .get();
         }
@@ -392,6 +425,7 @@ async function findMatchInDatabase(serviceDescription, serviceCategory) {
         // No specific code pattern for this category, use regular query
         querySnapshot = await db.collection('cptCodeMappings')
           .where('keywords', 'array-contains-any', keywords)
+          .select(...CPT_MATCH_FIELDS)
           .limit(20)
           .get();
       }
@@ -399,6 +433,7 @@ async function findMatchInDatabase(serviceDescription, serviceCategory) {
       // No category provided, use regular query
       querySnapshot = await db.collection('cptCodeMappings')
         .where('keywords', 'array-contains-any', keywords)
+        .select(...CPT_MATCH_FIELDS)
         .limit(20)
         .get();
     }
@@ -632,72 +667,107 @@ Confidence: ${dbMatch.confidence.toFixed(2)}`;
   "reasoning": "Brief explanation of why this code is appropriate"
 }`;
 
-    console.log('[CPT_MATCHER_AI] Calling OpenAI API for CPT code matching');
-    console.log('[CPT_MATCHER_AI] Prompt:', prompt);
-    
-    // Call OpenAI API
-    const response = await openai.chat.completions.create({
-      model: process.env.OPENAI_MODEL || 'gpt-4-turbo',
-      messages: [
-        { 
-          role: 'system', 
-          content: 'You are a medical coding expert specializing in CPT/HCPCS codes. Your task is to match service descriptions to the most appropriate code. Be precise and consider the exact wording of the service description. For example, "Ear and throat examination" should match to 92502 (otolaryngologic examination).' 
-        },
-        { role: 'user', content: prompt }
-      ],
-      temperature: 0.2,
-      response_format: { type: "json_object" }
-    });
+    // Share one OpenAI call per distinct prompt. The cache holds promises, so identical
+    // line items that are matched in parallel wait on the same in-flight request
+    const cacheKey = createHash('sha256').update(prompt).digest('hex');
+    let pendingMatch = openAIMatchCache.get(cacheKey);
     
-    // Parse the response
-    const result = JSON.parse(response.choices[0].message.content);
-    console.log('[CPT_MATCHER_AI] OpenAI response:', JSON.stringify(result, null, 2));
-    
-    // Validate the CPT code format (5 digits for CPT, alphanumeric for HCPCS)
-    const isValidCode = /^\d{5}$/.test(result.cptCode) || /^[A-Z]\d{4}$/.test(result.cptCode);
-    
-    if (!isValidCode) {
-      console.warn('[CPT_MATCHER_AI] OpenAI returned invalid code format:', result.cptCode);
-      return null;
-    }
-    
-    // Check if the code is compatible with the service category
-    if (serviceCategory && !isMatchCompatibleWithCategory(result.cptCode, serviceCategory)) {
-      console.warn(`[CPT_MATCHER_AI] OpenAI returned code ${result.cptCode} which is not compatible with category ${serviceCategory}`);
-      // We'll still return the result, but with a lower confidence
-      result.confidence = Math.min(result.confidence, 0.6);
-      result.reasoning += ` (Note: This code may not be fully compatible with the service category "${serviceCategory}")`;
+    if (pendingMatch) {
+      console.log('[CPT_MATCHER_AI] Using cached OpenAI match');
+    } else {
+      // Evict the oldest entry once the cache is full (Map keeps insertion order)
+      if (openAIMatchCache.size >= OPENAI_MATCH_CACHE_SIZE) {
+        openAIMatchCache.delete(openAIMatchCache.keys().next().value);
+      }
+      
+      pendingMatch = requestOpenAIMatch(prompt, serviceDescription, serviceCategory);
+      openAIMatchCache.set(cacheKey, pendingMatch);
+      
+      // Don't keep failed lookups around so they can be retried
+      pendingMatch.then(
+        match => { if (!match) openAIMatchCache.delete(cacheKey); },
+        () => openAIMatchCache.delete(cacheKey)
+      );
     }
     
-    return {
-      cptCode: result.cptCode,
-      description: result.description || serviceDescription,
-      confidence: result.confidence || 0.8,
-      reasoning: result.reasoning || 'Matched using AI'
-    };
+    const match = await pendingMatch;
+    return match ? { ...match } : null;
   } catch (error) {
     console.error('[CPT_MATCHER_AI] Error finding match with OpenAI:', error);
     return null;
   }
 }
 
+/**
+ * Call OpenAI for a CPT match and validate the returned code
+ * @param {string} prompt - The full matching prompt
+ * @param {string} serviceDescription - The service description from the bill
+ * @param {string|null} serviceCategory - The service category, if known
+ * @returns {Promise<object|null>} - The validated match or null
+ */
+async function requestOpenAIMatch(prompt, serviceDescription, serviceCategory) {
+  console.log('[CPT_MATCHER_AI] Calling OpenAI API for CPT code matching');
+  console.log('[CPT_MATCHER_AI] Prompt:', prompt);
+  
+  // Call OpenAI API
+  const response = await openai.chat.completions.create({
+    model: process.env.OPENAI_MODEL || 'gpt-4-turbo',
+    messages: [
+      { 
+        role: 'system', 
+        content: 'You are a medical coding expert specializing in CPT/HCPCS codes. Your task is to match service descriptions to the most appropriate code. Be precise and consider the exact wording of the service description. For example, "Ear and throat examination" should match to 92502 (otolaryngologic examination).' 
+      },
+      { role: 'user', content: prompt }
+    ],
+    temperature: 0.2,
+    response_format: { type: "json_object" }
+  });
+  
+  // Parse the response
+  const result = JSON.parse(response.choices[0].message.content);
+  console.log('[CPT_MATCHER_AI] OpenAI response:', JSON.stringify(result, null, 2));
+  
+  // Validate the CPT code format (5 digits for CPT, alphanumeric for HCPCS)
+  const isValidCode = /^\d{5}$/.test(result.cptCode) || /^[A-Z]\d{4}$/.test(result.cptCode);
+  
+  if (!isValidCode) {
+    console.warn('[CPT_MATCHER_AI] OpenAI returned invalid code format:', result.cptCode);
+    return null;
+  }
+  
+  // Check if the code is compatible with the service category
+  if (serviceCategory && !isMatchCompatibleWithCategory(result.cptCode, serviceCategory)) {
+    console.warn(`[CPT_MATCHER_AI] OpenAI returned code ${result.cptCode} which is not compatible with category ${serviceCategory}`);
+    // We'll still return the result, but with a lower confidence
+    result.confidence = Math.min(result.confidence, 0.6);
+    result.reasoning += ` (Note: This code may not be fully compatible with the service category "${serviceCategory}")`;
+  }
+  
+  return {
+    cptCode: result.cptCode,
+    description: result.description || serviceDescription,
+    confidence: result.confidence || 0.8,
+    reasoning: result.reasoning || 'Matched using AI'
+  };
+}
+
+// Common medical stopwords to filter out
+const STOPWORDS = new Set(['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or', 
+                           'patient', 'service', 'procedure', 'treatment', 'medical', 'care']);
+
 /**
  * Extract keywords from a service description
  * @param {string} description - The service description
  * @returns {string[]} - Array of keywords
  */
 function extractKeywords(description) {
-  // Common medical stopwords to filter out
-  const stopwords = ['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or', 
-                     'patient', 'service', 'procedure', 'treatment', 'medical', 'care'];
-  
   // Split, filter and return unique keywords
   return [...new Set(
     description
       .toLowerCase()
       .replace(/[^\w\s]/g, '')
       .split(' ')
-      .filter(word => word.length > 2 && !stopwords.includes(word))
+      .filter(word => word.length > 2 && !STOPWORDS.has(word))
       .map(word => word.trim())
   )];
 }
@@ -26,11 +26,16 @@ const dmeCategories = {
   'Prosthetic Devices': ['prosthetic', 'artificial limb', 'prosthesis']
 };
 
+// Common DME stopwords to filter out
+const STOPWORDS = new Set(['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or',
+                           'each', 'per', 'unit', 'item', 'equipment', 'supply', 'device']);
+
 // Load DME pricing data from Excel file
 function loadDMEPricingData() {
   try {
     const dmeFilePath = '/Users/bentenner/vlada/Databases/DME.xlsx';
-    const workbook = xlsx.readFile(dmeFilePath);
+    // Only the first sheet is used, so don't parse the rest of the workbook
+    const workbook = xlsx.readFile(dmeFilePath, { sheets: 0 });
     const worksheet = workbook.Sheets[workbook.SheetNames[0]];
     const data = xlsx.utils.sheet_to_json(worksheet);
 
@@ -253,6 +258,14 @@ async function lookupDMECode(code) {
   }
 }
 
+// Look for patterns like "HCPCS: E1234" or "DME K1234" or just "E1234"
+const CODE_PATTERNS = [
+  /HCPCS:?\s*([EKL][0-9]{4})/i,
+  /DME:?\s*([EKL][0-9]{4})/i,
+  /Code:?\s*([EKL][0-9]{4})/i,
+  /([EKL][0-9]{4})/i
+];
+
 /**
  * Extract a DME code from a service description
  * @param {string} description - The service description
@@ -261,15 +274,7 @@ async function lookupDMECode(code) {
 function extractCodeFromDescription(description) {
   if (!description) return null;
   
-  // Look for patterns like "HCPCS: E1234" or "DME K1234" or just "E1234"
-  const codePatterns = [
-    /HCPCS:?\s*([EKL][0-9]{4})/i,
-    /DME:?\s*([EKL][0-9]{4})/i,
-    /Code:?\s*([EKL][0-9]{4})/i,
-    /([EKL][0-9]{4})/i
-  ];
-  
-  for (const pattern of codePatterns) {
+  for (const pattern of CODE_PATTERNS) {
     const match = description.match(pattern);
     if (match && match[1]) {
       return match[1].toUpperCase();
@@ -472,17 +477,13 @@ function calculateMatchScore(serviceDesc, dmeDesc) {
 function generateKeywords(description) {
   if (!description) return [];
   
-  // Common DME stopwords to filter out
-  const stopwords = ['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or',
-                    'each', 'per', 'unit', 'item', 'equipment', 'supply', 'device'];
-  
   // Split, filter and return unique keywords
   return [...new Set(
     description
       .toLowerCase()
       .replace(/[^\w\s]/g, '')
       .split(' ')
-      .filter(word => word.length > 2 && !stopwords.includes(word))
+      .filter(word => word.length > 2 && !STOPWORDS.has(word))
       .map(word => word.trim())
   )];
 }
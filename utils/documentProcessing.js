@@ -1,9 +1,10 @@
 import pdf from 'pdf-parse';
 import OpenAI from 'openai';
 import fetch from 'node-fetch';
+import https from 'https';
 // Removing direct sharp import - we'll only use the safe import
 // import sharp from 'sharp';
-import { ImageAnnotatorClient } from '@google-cloud/vision';
+import { visionClient } from './visionClient.js';
 import { analyzeMedicalBillText } from './openaiClient.js';
 import { matchServiceToCPT } from './cptMatcher.js';
 import { matchServiceToLab } from './labMatcher.js';
@@ -24,45 +25,10 @@ const openai = new OpenAI({
   apiKey: process.env.OPENAI_API_KEY
 });
 
-// Initialize Google Cloud Vision client
-let visionClient;
-
-try {
-  // Format the private key correctly (replace escaped newlines with actual newlines)
-  // In some environments like Vercel, the private key might be double-escaped
-  let privateKey = process.env.GOOGLE_CLOUD_PRIVATE_KEY || '';
-  
-  // Handle different formats of the private key
-  if (privateKey.includes('\\n')) {
-    privateKey = privateKey.replace(/\\n/g, '\n');
-  }
-  
-  console.log('Initializing Google Cloud Vision client with environment variables');
-  console.log('Project ID:', process.env.GOOGLE_CLOUD_PROJECT_ID);
-  console.log('Client Email:', process.env.GOOGLE_CLOUD_CLIENT_EMAIL);
-  
-  // Create credentials object
-  const credentials = {
-    client_email: process.env.GOOGLE_CLOUD_CLIENT_EMAIL,
-    private_key: privateKey,
-    project_id: process.env.GOOGLE_CLOUD_PROJECT_ID
-  };
-  
-  // Log a sanitized version of the credentials for debugging
-  console.log('Using credentials:', {
-    client_email: credentials.client_email,
-    private_key: credentials.private_key ? 'PRESENT (starts with: ' + credentials.private_key.substring(0, 20) + '...)' : 'MISSING',
-    project_id: credentials.project_id
-  });
-  
-  visionClient = new ImageAnnotatorClient({
-    credentials: credentials
-  });
-  
-  console.log('Google Cloud Vision client initialized successfully');
-} catch (error) {
-  console.error('Error initializing Google Cloud Vision client:', error);
-}
+// Shared keep-alive agent so the HEAD and GET for the same file (and later files
+// on a warm instance) reuse the TLS connection to Firebase Storage
+const httpsAgent = new https.Agent({ keepAlive: true });
+const fetchAgent = (parsedUrl) => (parsedUrl.protocol === 'https:' ? httpsAgent : undefined);
 
 // Add image pre-processing functions
 async function preprocessImage(imageBuffer) {
@@ -73,18 +39,13 @@ async function preprocessImage(imageBuffer) {
       // Use our safe Sharp import instead of direct import
       const safeSharp = await getSafeSharp();
       
-      // First convert to PNG format to ensure compatibility
-      const pngBuffer = await safeSharp(imageBuffer)
-        .toFormat('png')
-        .toBuffer();
-      
-      console.log('Converted image to PNG format');
-      
-      // Then apply enhancements for better OCR
-      return await safeSharp(pngBuffer)
+      // Apply enhancements for better OCR and encode to PNG in a single pass,
+      // so the image is only decoded and encoded once
+      return await safeSharp(imageBuffer)
         .grayscale() // Convert to grayscale
         .normalize() // Normalize the image contrast
         .sharpen() // Sharpen the image
+        .toFormat('png') // Convert to PNG format to ensure compatibility
         .toBuffer();
     } catch (sharpError) {
       console.error('Sharp module error during image pre-processing:', sharpError);
@@ -205,6 +166,7 @@ export async function fetchFileBuffer(fileUrl) {
       console.log('Using URL with cache buster:', urlWithCacheBuster);
       
       const response = await fetch(urlWithCacheBuster, {
+        agent: fetchAgent,
         headers: {
           'Accept': 'image/*, application/pdf',
           'Cache-Control': 'no-cache'
@@ -341,11 +303,8 @@ export async function processWithLLM(text, isVerificationMode = false) {
     console.log('Raw OpenAI response:', responseContent);
 
     try {
-      // Clean the response content before parsing
-      const cleanedContent = cleanJsonResponse(responseContent);
-      console.log('Cleaned response content:', cleanedContent);
-      
-      const parsedResponse = JSON.parse(cleanedContent);
+      // JSON mode guarantees a bare JSON object, so parse it directly
+      const parsedResponse = JSON.parse(responseContent);
       
       if (isVerificationMode) {
         if (typeof parsedResponse.isMedicalBill !== 'boolean') {
@@ -400,33 +359,6 @@ export async function processWithLLM(text, isVerificationMode = false) {
   }
 }
 
-/**
- * Clean JSON response from OpenAI to handle formatting issues
- * @param {string} content - The raw response content
- * @returns {string} - Cleaned JSON string
- */
-function cleanJsonResponse(content) {
-  if (!content) return '{}';
-  
-  // Remove markdown code block indicators
-  let cleaned = content.replace(/```json\s*/g, '').replace(/```\s*$/g, '');
-  
-  // Remove any leading/trailing whitespace
-  cleaned = cleaned.trim();
-  
-  // If the content doesn't start with {, add it
-  if (!cleaned.startsWith('{')) {
-    cleaned = '{' + cleaned;
-  }
-  
-  // If the content doesn't end with }, add it
-  if (!cleaned.endsWith('}')) {
-    cleaned = cleaned + '}';
-  }
-  
-  return cleaned;
-}
-
 /**
  * Determine if a service should use facility or non-facility rates
  * @param {Object} service - The service to check
@@ -504,6 +436,19 @@ function determineFacilityType(service, billInfo) {
   return facilityType;
 }
 
+/**
+ * The six service categories OpenAI may return, built once for response validation
+ */
+const VALID_SERVICE_CATEGORIES = [
+  'Office visits and Consultations',
+  'Procedures and Surgeries',
+  'Lab and Diagnostic Tests',
+  'Drugs and Infusions',
+  'Medical Equipment',
+  'Hospital stays and emergency care visits'
+];
+const VALID_SERVICE_CATEGORY_SET = new Set(VALID_SERVICE_CATEGORIES);
+
 /**
  * Categorize a medical service into one of six predefined buckets using OpenAI
  * @param {object} service - The service object to categorize
@@ -585,21 +530,12 @@ Please categorize this service into one of these six categories. Respond in JSON
     console.log('[SERVICE_CATEGORIZATION_AI] OpenAI response:', JSON.stringify(result, null, 2));
     
     // Validate the category
-    const validCategories = [
-      'Office visits and Consultations',
-      'Procedures and Surgeries',
-      'Lab and Diagnostic Tests',
-      'Drugs and Infusions',
-      'Medical Equipment',
-      'Hospital stays and emergency care visits'
-    ];
-    
-    if (!validCategories.includes(result.category)) {
+    if (!VALID_SERVICE_CATEGORY_SET.has(result.category)) {
       console.warn('[SERVICE_CATEGORIZATION_AI] OpenAI returned invalid category:', result.category);
         // Instead of returning immediately, let's map to the closest category
         const defaultCategory = 'Other';
         // Try to find the closest category
-        for (const validCategory of validCategories) {
+        for (const validCategory of VALID_SERVICE_CATEGORIES) {
           if (result.category.toLowerCase().includes(validCategory.toLowerCase())) {
             console.log(`[SERVICE_CATEGORIZATION_AI] Mapped invalid category "${result.category}" to "${validCategory}"`);
             return { 
@@ -620,8 +556,9 @@ Please categorize this service into one of these six categories. Respond in JSON
       lastError = error;
       console.error(`[SERVICE_CATEGORIZATION_AI] Error categorizing service with OpenAI (Attempt ${retryCount + 1}/${MAX_RETRIES}):`, error);
       
-      // Implement exponential backoff
-      const backoffTime = Math.min(1000 * Math.pow(2, retryCount), 8000); // Max 8 second backoff
+      // Implement exponential backoff with jitter so concurrent failures don't retry in lockstep
+      const backoffTime = Math.min(1000 * Math.pow(2, retryCount), 8000) // Max 8 second backoff
+        + Math.floor(Math.random() * 500);
       console.log(`[SERVICE_CATEGORIZATION_AI] Retrying in ${backoffTime}ms...`);
       await new Promise(resolve => setTimeout(resolve, backoffTime));
       
@@ -636,24 +573,24 @@ Please categorize this service into one of these six categories. Respond in JSON
   return fallbackCategorization(service);
 }
 
+// Define category keywords for fallback categorization
+const FALLBACK_CATEGORY_KEYWORDS = Object.entries({
+  'Office visits and Consultations': ['office visit', 'consult', 'evaluation', 'exam', 'check-up', 'checkup'],
+  'Procedures and Surgeries': ['surgery', 'procedure', 'biopsy', 'repair', 'implant', 'removal'],
+  'Lab and Diagnostic Tests': ['lab', 'test', 'blood', 'urine', 'specimen', 'diagnostic', 'x-ray', 'scan', 'mri', 'ct'],
+  'Drugs and Infusions': ['drug', 'medication', 'injection', 'infusion', 'iv', 'vaccine', 'ondansetron', 'promethazine', 'famotidine'],
+  'Medical Equipment': ['equipment', 'supply', 'device', 'prosthetic', 'orthotic', 'brace'],
+  'Hospital stays and emergency care visits': ['emergency', 'er', 'hospital', 'inpatient', 'room', 'admission']
+});
+
 /**
  * Fallback categorization using keyword matching when OpenAI fails
  */
 function fallbackCategorization(service) {
   const description = (service.description || '').toLowerCase();
   
-  // Define category keywords
-  const categoryKeywords = {
-    'Office visits and Consultations': ['office visit', 'consult', 'evaluation', 'exam', 'check-up', 'checkup'],
-    'Procedures and Surgeries': ['surgery', 'procedure', 'biopsy', 'repair', 'implant', 'removal'],
-    'Lab and Diagnostic Tests': ['lab', 'test', 'blood', 'urine', 'specimen', 'diagnostic', 'x-ray', 'scan', 'mri', 'ct'],
-    'Drugs and Infusions': ['drug', 'medication', 'injection', 'infusion', 'iv', 'vaccine', 'ondansetron', 'promethazine', 'famotidine'],
-    'Medical Equipment': ['equipment', 'supply', 'device', 'prosthetic', 'orthotic', 'brace'],
-    'Hospital stays and emergency care visits': ['emergency', 'er', 'hospital', 'inpatient', 'room', 'admission']
-  };
-  
   // Check each category for matching keywords
-  for (const [category, keywords] of Object.entries(categoryKeywords)) {
+  for (const [category, keywords] of FALLBACK_CATEGORY_KEYWORDS) {
     for (const keyword of keywords) {
       if (description.includes(keyword)) {
         console.log(`[FALLBACK_CATEGORIZATION] Matched service to "${category}" based on keyword "${keyword}"`);
@@ -780,6 +717,32 @@ Respond in JSON format:
   }
 }
 
+// Maximum number of services enhanced at once. Each service can make several
+// OpenAI and Firestore calls, so an unbounded fan-out on long bills trips rate limits
+const SERVICE_ENHANCEMENT_CONCURRENCY = 8;
+
+/**
+ * Map over items with at most `limit` calls in flight, preserving result order
+ * @param {Array} items - The items to process
+ * @param {number} limit - Maximum number of concurrent calls
+ * @param {Function} fn - Async function called with (item, index)
+ * @returns {Promise<Array>} - The results in input order
+ */
+async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length);
+  let nextIndex = 0;
+  
+  const worker = async () => {
+    while (nextIndex < items.length) {
+      const index = nextIndex++;
+      results[index] = await fn(items[index], index);
+    }
+  };
+  
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+  return results;
+}
+
 /**
  * Enhance services with CPT codes
  * @param {Array} services - The services extracted from the bill
@@ -1161,9 +1124,11 @@ async function enhanceServicesWithCPTCodes(services, patientInfo, billInfo) {
   };
   
   try {
-    // Process all services in parallel using Promise.all
-    const enhancedServices = await Promise.all(
-      services.map((service, index) => processService(service, index))
+    // Process services in parallel, bounded so long bills don't flood the APIs
+    const enhancedServices = await mapWithConcurrency(
+      services,
+      SERVICE_ENHANCEMENT_CONCURRENCY,
+      processService
     );
     
     console.log('[SERVICE_ENHANCEMENT] All services enhanced in parallel. Total services:', enhancedServices.length);
@@ -1354,7 +1319,7 @@ export async function detectFileType(fileUrl) {
       throw new Error('No file URL provided');
     }
 
-    const response = await fetch(fileUrl, { method: 'HEAD' });
+    const response = await fetch(fileUrl, { method: 'HEAD', agent: fetchAgent });
     if (!response.ok) {
       throw new Error(`Failed to fetch file headers: ${response.status}`);
     }
@@ -351,6 +351,16 @@ async function lookupDrugCode(code) {
   }
 }
 
+// Look for patterns like "J-code: J1234" or "HCPCS J1234" or just "J1234"
+const CODE_PATTERNS = [
+  /J-code:?\s*([J][0-9]{4})/i,
+  /HCPCS:?\s*([J][0-9]{4})/i,
+  /Code:?\s*([J][0-9]{4})/i,
+  /([J][0-9]{4})/i,
+  /CPT:?\s*(9[0-9]{4})/i,  // For drug administration CPT codes
+  /(9[0-9]{4})/            // For drug administration CPT codes
+];
+
 /**
  * Extract a drug code from a service description
  * @param {string} description - The service description
@@ -359,17 +369,7 @@ async function lookupDrugCode(code) {
 function extractCodeFromDescription(description) {
   if (!description) return null;
   
-  // Look for patterns like "J-code: J1234" or "HCPCS J1234" or just "J1234"
-  const codePatterns = [
-    /J-code:?\s*([J][0-9]{4})/i,
-    /HCPCS:?\s*([J][0-9]{4})/i,
-    /Code:?\s*([J][0-9]{4})/i,
-    /([J][0-9]{4})/i,
-    /CPT:?\s*(9[0-9]{4})/i,  // For drug administration CPT codes
-    /(9[0-9]{4})/            // For drug administration CPT codes
-  ];
-  
-  for (const pattern of codePatterns) {
+  for (const pattern of CODE_PATTERNS) {
     const match = description.match(pattern);
     if (match && match[1]) {
       return match[1];
@@ -197,6 +197,17 @@ export async function matchServiceToLab(serviceDescription, additionalContext =
   }
 }
 
+// Look for patterns like "(LAB) 80053" or just "80053"
+const CODE_PATTERNS = [
+  /\(LAB\)\s*(\d{5})/i,
+  /\(LAB\)\s*(\d{3,4})/i,
+  /LAB CODE:?\s*(\d{3,5})/i,
+  /CODE:?\s*(\d{5})/i,
+  /\s(\d{5})\s/,
+  /^(\d{5})$/,
+  /\s(\d{5})$/
+];
+
 /**
  * Extract a lab code from a service description
  * @param {string} description - The service description
@@ -205,18 +216,7 @@ export async function matchServiceToLab(serviceDescription, additionalContext =
 function extractCodeFromDescription(description) {
   if (!description) return null;
   
-  // Look for patterns like "(LAB) 80053" or just "80053"
-  const codePatterns = [
-    /\(LAB\)\s*(\d{5})/i,
-    /\(LAB\)\s*(\d{3,4})/i,
-    /LAB CODE:?\s*(\d{3,5})/i,
-    /CODE:?\s*(\d{5})/i,
-    /\s(\d{5})\s/,
-    /^(\d{5})$/,
-    /\s(\d{5})$/
-  ];
-  
-  for (const pattern of codePatterns) {
+  for (const pattern of CODE_PATTERNS) {
     const match = description.match(pattern);
     if (match && match[1]) {
       // Normalize to 5 digits
@@ -227,6 +227,14 @@ function extractCodeFromDescription(description) {
   return null;
 }
 
+// Fallback rates for common lab codes missing from the database
+const COMMON_LAB_CODES = {
+  '80053': { code: '80053', description: 'Comprehensive Metabolic Panel', rate: 10.56 },
+  '85025': { code: '85025', description: 'Complete CBC w/Auto Diff WBC', rate: 8.63 },
+  '81003': { code: '81003', description: 'Urinalysis, automated, w/o microscopy', rate: 2.25 },
+  '81025': { code: '81025', description: 'Urine pregnancy test, visual color comparison', rate: 8.61 }
+};
+
 /**
  * Look up a lab code in the database
  * @param {string} labCode - The lab code to look up
@@ -278,17 +286,8 @@ async function lookupLabCode(labCode) {
     }
     
     // Fall back to common lab codes if not found in database
-    // Handle common lab codes directly
-    const commonLabCodes = {
-      '80053': { code: '80053', description: 'Comprehensive Metabolic Panel', rate: 10.56 },
-      '85025': { code: '85025', description: 'Complete CBC w/Auto Diff WBC', rate: 8.63 },
-      '81003': { code: '81003', description: 'Urinalysis, automated, w/o microscopy', rate: 2.25 },
-      '81025': { code: '81025', description: 'Urine pregnancy test, visual color comparison', rate: 8.61 }
-    };
-    
-    // Check if it's a common lab code
-    if (commonLabCodes[labCode]) {
-      const data = commonLabCodes[labCode];
+    if (COMMON_LAB_CODES[labCode]) {
+      const data = COMMON_LAB_CODES[labCode];
       console.log(`[LAB_MATCHER] Found fallback rate in common lab codes: ${labCode}`, data);
       return {
         labCode: data.code,
@@ -467,6 +466,7 @@ async function findLabMatchInDatabase(serviceDescription) {
     
     const querySnapshot = await db.collection('labCodes')
       .where('keywords', 'array-contains-any', keywords)
+      .select('code', 'description', 'detailedDescription', 'rate')
       .limit(20)
       .get();
     
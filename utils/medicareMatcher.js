@@ -284,13 +284,12 @@ async function lookupMedicareRate(code) {
       if (adminDb) {
         console.log(`[MEDICARE_MATCHER] Checking for code ${code} in Firestore database first`);
         
-        // First try medicareCodes collection
-        let docRef = await adminDb.collection('medicareCodes').doc(code).get();
-        
-        if (!docRef.exists) {
-          // If not found, try cptCodeMappings collection
-          docRef = await adminDb.collection('cptCodeMappings').doc(code).get();
-        }
+        // Read both collections in one round-trip; medicareCodes takes precedence over cptCodeMappings
+        const [medicareDoc, cptDoc] = await adminDb.getAll(
+          adminDb.collection('medicareCodes').doc(code),
+          adminDb.collection('cptCodeMappings').doc(code)
+        );
+        const docRef = medicareDoc.exists ? medicareDoc : cptDoc;
         
         if (docRef.exists) {
           const data = docRef.data();
@@ -334,6 +333,16 @@ async function lookupMedicareRate(code) {
   }
 }
 
+// Look for patterns like "CPT: 99213" or just "99213"
+const CODE_PATTERNS = [
+  /CPT:?\s*(\d{5})/i,
+  /Code:?\s*(\d{5})/i,
+  /\s(\d{5})\s/,
+  /^(\d{5})$/,
+  /\s(\d{5})$/,
+  /(\d{5})/
+];
+
 /**
  * Extract a CPT code from a service description
  * @param {string} description - The service description
@@ -342,17 +351,7 @@ async function lookupMedicareRate(code) {
 function extractCodeFromDescription(description) {
   if (!description) return null;
   
-  // Look for patterns like "CPT: 99213" or just "99213"
-  const codePatterns = [
-    /CPT:?\s*(\d{5})/i,
-    /Code:?\s*(\d{5})/i,
-    /\s(\d{5})\s/,
-    /^(\d{5})$/,
-    /\s(\d{5})$/,
-    /(\d{5})/
-  ];
-  
-  for (const pattern of codePatterns) {
+  for (const pattern of CODE_PATTERNS) {
     const match = description.match(pattern);
     if (match && match[1]) {
       const code = match[1];
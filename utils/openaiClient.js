@@ -6,6 +6,21 @@ import axios from 'axios';
 const OPENAI_API_KEY = process.env.OPENAI_API_KEY;
 const OPENAI_API_URL = 'https://api.openai.com/v1/chat/completions';
 
+// System prompt for the OpenAI model; it never changes, so build it once at module load
+const SYSTEM_PROMPT = `You are a medical billing expert AI. Your job is to analyze unstructured medical bill text and extract structured data.
+      
+You will receive raw text extracted from a medical bill image. This text may contain OCR errors or formatting issues.
+      
+Please extract and return the following information in a structured JSON format:
+- patientInfo: Include name, contact details, and any patient identifiers
+- providerInfo: Include provider name, facility, contact information
+- billing: Include total cost, amount due, date of service, due date
+- services: An array of services rendered, each with description and cost
+- insurance: Any insurance details including plan, coverage, co-pays
+- additionalInfo: Any other relevant information from the bill
+      
+Return ONLY valid JSON without explanations or markdown formatting. If information is not found, use null or leave the field empty.`;
+
 /**
  * Analyzes extracted medical bill text using OpenAI to extract structured information
  * 
@@ -22,28 +37,13 @@ async function analyzeMedicalBillText(extractedText) {
   console.log(`Text length: ${extractedText.length} characters`);
 
   try {
-    // Construct the system prompt for the OpenAI model
-    const systemPrompt = `You are a medical billing expert AI. Your job is to analyze unstructured medical bill text and extract structured data.
-      
-You will receive raw text extracted from a medical bill image. This text may contain OCR errors or formatting issues.
-      
-Please extract and return the following information in a structured JSON format:
-- patientInfo: Include name, contact details, and any patient identifiers
-- providerInfo: Include provider name, facility, contact information
-- billing: Include total cost, amount due, date of service, due date
-- services: An array of services rendered, each with description and cost
-- insurance: Any insurance details including plan, coverage, co-pays
-- additionalInfo: Any other relevant information from the bill
-      
-Return ONLY valid JSON without explanations or markdown formatting. If information is not found, use null or leave the field empty.`;
-
     // Construct the OpenAI API request
     const response = await axios.post(
       OPENAI_API_URL,
       {
         model: "gpt-4-turbo", // Or your preferred model
         messages: [
-          { role: "system", content: systemPrompt },
+          { role: "system", content: SYSTEM_PROMPT },
           { role: "user", content: extractedText }
         ],
         temperature: 0.1, // Low temperature for more deterministic results
@@ -174,6 +174,14 @@ async function lookupOPPSCode(code) {
   }
 }
 
+// Look for patterns like "CPT: 12345" or "HCPCS J1234" or just "12345"
+const CODE_PATTERNS = [
+  /CPT:?\s*(\d{5})/i,
+  /HCPCS:?\s*([A-Z]\d{4})/i,
+  /Code:?\s*(\d{5}|[A-Z]\d{4})/i,
+  /(\d{5}|[A-Z]\d{4})/
+];
+
 /**
  * Extract a CPT/HCPCS code from a service description
  * @param {string} description - The service description
@@ -182,15 +190,7 @@ async function lookupOPPSCode(code) {
 function extractCodeFromDescription(description) {
   if (!description) return null;
   
-  // Look for patterns like "CPT: 12345" or "HCPCS J1234" or just "12345"
-  const codePatterns = [
-    /CPT:?\s*(\d{5})/i,
-    /HCPCS:?\s*([A-Z]\d{4})/i,
-    /Code:?\s*(\d{5}|[A-Z]\d{4})/i,
-    /(\d{5}|[A-Z]\d{4})/
-  ];
-  
-  for (const pattern of codePatterns) {
+  for (const pattern of CODE_PATTERNS) {
     const match = description.match(pattern);
     if (match && match[1]) {
       return match[1];
@@ -372,6 +372,10 @@ The confidence should reflect your certainty in the match, with values:
   }
 }
 
+// Common medical stopwords to filter out
+const STOPWORDS = new Set(['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or', 
+                           'patient', 'service', 'procedure', 'treatment', 'medical', 'care']);
+
 /**
  * Extract keywords from a service description
  * @param {string} description - The service description
@@ -380,17 +384,13 @@ The confidence should reflect your certainty in the match, with values:
 function extractKeywords(description) {
   if (!description) return [];
   
-  // Common medical stopwords to filter out
-  const stopwords = ['the', 'and', 'for', 'with', 'of', 'to', 'in', 'on', 'at', 'by', 'or', 
-                     'patient', 'service', 'procedure', 'treatment', 'medical', 'care'];
-  
   // Split, filter and return unique keywords
   return [...new Set(
     description
       .toLowerCase()
       .replace(/[^\w\s]/g, '')
       .split(' ')
-      .filter(word => word.length > 2 && !stopwords.includes(word))
+      .filter(word => word.length > 2 && !STOPWORDS.has(word))
       .map(word => word.trim())
   )];
 }
@@ -35,7 +35,10 @@ function createSharpFallback() {
     console.log('Using Sharp fallback with buffer size:', buffer?.length);
     return {
       toFormat: () => ({ toBuffer: async () => buffer }),
-      grayscale: () => ({ normalize: () => ({ sharpen: () => ({ toBuffer: async () => buffer }) }) }),
+      grayscale: () => ({ normalize: () => ({ sharpen: () => ({
+        toFormat: () => ({ toBuffer: async () => buffer }),
+        toBuffer: async () => buffer
+      }) }) }),
       resize: () => ({ toBuffer: async () => buffer }),
       metadata: async () => ({ width: 0, height: 0, format: 'unknown' })
     };